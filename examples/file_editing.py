@@ -3,6 +3,7 @@
 
 import anyio
 from pathlib import Path
+import reprlib
 import tempfile
 
 from cursor_agent_sdk import (
@@ -39,7 +40,12 @@ async def edit_files_example():
                     elif isinstance(block, ToolUseBlock):
                         print(f"[Tool Call] {block.name}: {block.input}")
                     elif isinstance(block, ToolResultBlock):
-                        print(f"[Tool Result] {block.content[:100]}...")
+                        content = block.content
+                        if isinstance(content, str):
+                            preview = content[:100]
+                        else:
+                            preview = reprlib.repr(content)
+                        print(f"[Tool Result] {preview}...")
 
             elif isinstance(message, ResultMessage):
                 print(f"\n[Done] Completed in {message.duration_ms}ms")
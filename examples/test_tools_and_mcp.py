@@ -2,6 +2,7 @@
 """Live test of cursor_agent_sdk with cursor-agent CLI."""
 
 import anyio
+import reprlib
 import sys
 
 from cursor_agent_sdk import (
@@ -53,7 +54,8 @@ Please be concise - just list the tools and MCP info, no lengthy explanations ne
                 if isinstance(content, str):
                     preview = content[:100] + "..." if len(content) > 100 else content
                 else:
-                    preview = str(content)[:100]
+                    # reprlib bounds the work instead of stringifying the whole list
+                    preview = reprlib.repr(content)
                 print(f"[USER] {preview}")
                 print()
 
@@ -65,8 +67,12 @@ Please be concise - just list the tools and MCP info, no lengthy explanations ne
                     elif isinstance(block, ToolUseBlock):
                         print(f"  [TOOL_USE] {block.name}: {block.input}")
                     elif isinstance(block, ToolResultBlock):
-                        content = str(block.content)[:200] if block.content else ""
-                        print(f"  [TOOL_RESULT] {content}...")
+                        content = block.content
+                        if isinstance(content, str):
+                            preview = content[:200]
+                        else:
+                            preview = reprlib.repr(content) if content else ""
+                        print(f"  [TOOL_RESULT] {preview}...")
                 print()
 
             elif isinstance(message, ResultMessage):
@@ -22,6 +22,7 @@ from ._errors import (
     ProcessError,
 )
 from ._version import __version__
+from .pool import CursorAgentPool
 from .query import query
 from .types import (
     AssistantMessage,
@@ -43,6 +44,7 @@ ClaudeSDKError = CursorSDKError
 __all__ = [
     # Main exports
     "query",
+    "CursorAgentPool",
     "__version__",
     # Types (native names)
     "CursorAgentOptions",
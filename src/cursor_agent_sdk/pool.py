@@ -0,0 +1,154 @@
+"""Pool of pre-started cursor-agent processes for repeated queries."""
+
+from types import TracebackType
+
+import anyio
+from anyio.abc import TaskGroup
+
+from .transport import SubprocessCLITransport
+from .types import CursorAgentOptions
+
+
+class CursorAgentPool:
+    """Keeps cursor-agent processes started ahead of time.
+
+    cursor-agent in --print mode answers a single prompt per process, so a
+    process cannot be reused once it has replied. Instead the pool starts
+    processes before they are needed - by the time a prompt arrives the CLI
+    (or Node.js on Windows) has already loaded - and starts a replacement
+    whenever one is handed out. Used with `async with`, replacements start in
+    the background; otherwise acquire() starts one before it returns.
+
+    Example:
+        ```python
+        async with CursorAgentPool(CursorAgentOptions(cwd="/project"), size=2) as pool:
+            for prompt in prompts:
+                async for message in query(prompt=prompt, pool=pool):
+                    print(message)
+        ```
+    """
+
+    def __init__(self, options: CursorAgentOptions | None = None, size: int = 2):
+        if size < 1:
+            raise ValueError("size must be at least 1")
+
+        self.options = options if options is not None else CursorAgentOptions()
+        self._size = size
+        self._idle: list[SubprocessCLITransport] = []
+        self._semaphore = anyio.Semaphore(size)
+        self._closed = False
+        # Runs replacement spawns while the pool is used as a context manager
+        self._task_group: TaskGroup | None = None
+
+    async def __aenter__(self) -> "CursorAgentPool":
+        task_group = anyio.create_task_group()
+        await task_group.__aenter__()
+        try:
+            await self.start()
+        except BaseException:
+            # Nothing runs in the group yet; exit it cleanly so the error from
+            # start() propagates as is rather than wrapped in an ExceptionGroup
+            await task_group.__aexit__(None, None, None)
+            raise
+        self._task_group = task_group
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        task_group, self._task_group = self._task_group, None
+        try:
+            await self.close()
+        finally:
+            # Waits for replacements still starting; they close themselves.
+            # _replenish() never raises, so the group is exited without the
+            # body's exception, which then propagates unchanged instead of
+            # wrapped in an ExceptionGroup.
+            if task_group:
+                await task_group.__aexit__(None, None, None)
+
+    async def _spawn(self) -> SubprocessCLITransport:
+        """Start a new cursor-agent process waiting for its prompt."""
+        transport = SubprocessCLITransport(prompt="", options=self.options)
+        await transport.start()
+        return transport
+
+    async def _replenish(self) -> None:
+        """Start one idle process if the pool has room for it."""
+        if self._closed or len(self._idle) >= self._size:
+            return
+        # If this fails, the next acquire() spawns (and reports) directly
+        try:
+            transport = await self._spawn()
+        except Exception:
+            return
+        if self._closed:
+            await transport.close()
+        else:
+            self._idle.append(transport)
+
+    async def start(self) -> None:
+        """Start idle processes until the pool is full."""
+        self._closed = False
+        try:
+            while len(self._idle) < self._size:
+                self._idle.append(await self._spawn())
+        except BaseException:
+            # Don't leave the processes already started waiting on stdin
+            await self.close()
+            raise
+
+    async def acquire(self, prompt: str) -> SubprocessCLITransport:
+        """Hand out a running process with the prompt already sent.
+
+        Waits while `size` transports are in use. The caller must pass the
+        transport back to release().
+        """
+        await self._semaphore.acquire()
+
+        transport: SubprocessCLITransport | None = None
+        try:
+            while self._idle:
+                candidate = self._idle.pop()
+                # Discard processes that exited while idle
+                if candidate.is_running():
+                    transport = candidate
+                    break
+                await candidate.close()
+
+            if transport is None:
+                transport = await self._spawn()
+
+            await transport.send_prompt(prompt)
+
+        except BaseException:
+            # close() shields itself, so this also runs on cancellation
+            if transport is not None:
+                await transport.close()
+            self._semaphore.release()
+            raise
+
+        # Replace it so the next acquire() finds a process already started
+        if self._task_group:
+            self._task_group.start_soon(self._replenish)
+        else:
+            await self._replenish()
+
+        return transport
+
+    async def release(self, transport: SubprocessCLITransport) -> None:
+        """Finish with a transport returned by acquire()."""
+        try:
+            await transport.close()
+        finally:
+            self._semaphore.release()
+
+    async def close(self) -> None:
+        """Stop all idle processes."""
+        self._closed = True
+        idle, self._idle = self._idle, []
+        for transport in idle:
+            await transport.close()
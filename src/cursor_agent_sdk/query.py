@@ -1,9 +1,9 @@
 """Query function for one-shot interactions with Cursor Agent."""
 
-import os
 from collections.abc import AsyncIterator
 from typing import Any
 
+from .pool import CursorAgentPool
 from .transport import SubprocessCLITransport
 from .types import CursorAgentOptions, Message
 
@@ -12,6 +12,7 @@ async def query(
     *,
     prompt: str,
     options: CursorAgentOptions | None = None,
+    pool: CursorAgentPool | None = None,
 ) -> AsyncIterator[Message]:
     """
     Query Cursor Agent for one-shot interactions.
@@ -29,6 +30,9 @@ async def query(
                  - 'bypassPermissions': Allow all tools (uses --force)
                  Set options.cwd for working directory.
                  Set options.model to specify the model.
+        pool: Optional CursorAgentPool to take an already-started cursor-agent
+              process from. The pool's options are used, so options must not
+              also be given.
 
     Yields:
         Messages from the conversation (SystemMessage, UserMessage,
@@ -66,12 +70,30 @@ async def query(
                     if isinstance(block, TextBlock):
                         print(block.text)
         ```
+
+    Example - Repeated queries with a pool:
+        ```python
+        async with CursorAgentPool(CursorAgentOptions(cwd="/home/user/project")) as pool:
+            for prompt in ["Summarize README.md", "List the TODOs in src/"]:
+                async for message in query(prompt=prompt, pool=pool):
+                    print(message)
+        ```
     """
+    if pool is not None:
+        if options is not None:
+            raise ValueError("Pass either options or pool, not both")
+
+        transport = await pool.acquire(prompt)
+        try:
+            async for message in transport.read_messages():
+                yield message
+        finally:
+            await pool.release(transport)
+        return
+
     if options is None:
         options = CursorAgentOptions()
 
-    os.environ["CURSOR_AGENT_SDK_ENTRYPOINT"] = "sdk-py"
-
     transport = SubprocessCLITransport(prompt=prompt, options=options)
 
     try:
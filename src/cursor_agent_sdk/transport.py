@@ -4,15 +4,25 @@ import json
 import os
 import platform
 import shutil
-from collections.abc import AsyncIterator
-from contextlib import suppress
+import sys
+import tempfile
+import time
+from collections.abc import AsyncGenerator, AsyncIterator, Callable
+from contextlib import aclosing, suppress
+from functools import cache
+from itertools import chain
+from operator import itemgetter
 from pathlib import Path
 from subprocess import PIPE
-from typing import Any
+from typing import IO, Any
 
 import anyio
-from anyio.abc import Process
-from anyio.streams.text import TextReceiveStream
+from anyio.abc import ByteReceiveStream, Process
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
 
 from ._errors import CLIConnectionError, CLIJSONDecodeError, CLINotFoundError, ProcessError
 from .types import (
@@ -29,8 +39,296 @@ from .types import (
 
 _DEFAULT_MAX_BUFFER_SIZE = 1024 * 1024  # 1MB buffer limit
 
-# Default Windows cursor-agent location (community-patched Node.js version)
-_DEFAULT_WINDOWS_CURSOR_AGENT_JS = Path.home() / "Downloads" / "cursor" / "vibe" / "cursor_agent_mod" / "2026.01.02-80e4d9b-windows" / "index.js"
+
+# JSON parser bound once, so the per-event path has no module attribute lookup
+_loads: Callable[[str | bytes], Any] = orjson.loads if orjson else json.loads
+
+
+# Max bytes taken from stdout per receive(). anyio defaults to 64 KiB; asyncio's
+# pipe transport reads up to 256 KiB per os.read(), so matching that drains a
+# full read in one call. receive() returns as soon as any data is available, so
+# a larger size never delays the first message.
+_READ_CHUNK_SIZE = 256 * 1024
+
+# stderr goes to a temporary file; this much of its end is reported on failure
+_MAX_STDERR_SIZE = 64 * 1024
+# Size at which the stderr file is cut back to its last _MAX_STDERR_SIZE bytes
+_MAX_STDERR_FILE_SIZE = 1024 * 1024
+# How long close() waits after terminate() before killing the process
+_TERMINATE_TIMEOUT = 5.0  # seconds
+
+# CLI discovery results shared across transports, keyed by cli_path override:
+# (path, is_node_js, monotonic timestamp)
+_CLI_CACHE: dict[str | None, tuple[str, bool, float]] = {}
+_CLI_CACHE_TTL = 300.0  # seconds
+
+# stream-json discriminator values, compared once per content item / tool event
+_TYPE_TEXT = sys.intern("text")
+_TYPE_TOOL_USE = sys.intern("tool_use")
+_SUBTYPE_STARTED = sys.intern("started")
+_SUBTYPE_COMPLETED = sys.intern("completed")
+
+# Model name reported when the CLI doesn't say which model produced a block
+_UNKNOWN_MODEL = sys.intern("unknown")
+
+# Fields of a system init event, fetched in one call when all are present
+_get_system_fields = itemgetter("session_id", "model", "cwd", "apiKeySource", "permissionMode")
+
+# Permission modes that map to cursor-agent's --force flag
+_FORCE_PERMISSION_MODES = frozenset({"acceptEdits", "bypassPermissions"})
+
+# Node.js executable used for the Windows cursor-agent script: (path, monotonic timestamp)
+_NODE_PATH: tuple[str, float] | None = None
+
+
+@cache
+def _default_windows_cli_path() -> Path:
+    """Default Windows cursor-agent location (community-patched Node.js version).
+
+    Built on first use rather than at import, since Path.home() reads the
+    environment and is only needed when discovery reaches the Windows fallbacks.
+    """
+    return (
+        Path.home() / "Downloads" / "cursor" / "vibe" / "cursor_agent_mod"
+        / "2026.01.02-80e4d9b-windows" / "index.js"
+    )
+
+
+def invalidate_cli_cache() -> None:
+    """Forget discovered cursor-agent and node locations, e.g. after reinstalling."""
+    global _NODE_PATH
+
+    _CLI_CACHE.clear()
+    _NODE_PATH = None
+
+
+def _find_node() -> str | None:
+    """Find the node executable, reusing a recent lookup."""
+    global _NODE_PATH
+
+    now = time.monotonic()
+    if _NODE_PATH and now - _NODE_PATH[1] < _CLI_CACHE_TTL:
+        return _NODE_PATH[0]
+
+    node_path = shutil.which("node")
+    _NODE_PATH = (node_path, now) if node_path else None
+    return node_path
+
+
+def _parse_system(data: dict[str, Any]) -> Message | None:
+    """Parse a system init event."""
+    try:
+        session_id, model, cwd, api_key_source, permission_mode = _get_system_fields(data)
+    except KeyError:
+        # Not every CLI version sends all of them
+        session_id = data.get("session_id", "")
+        model = data.get("model")
+        cwd = data.get("cwd")
+        api_key_source = data.get("apiKeySource")
+        permission_mode = data.get("permissionMode")
+
+    return SystemMessage(
+        subtype=data.get("subtype") or "init",
+        data={
+            "session_id": session_id,
+            "model": model,
+            "cwd": cwd,
+            "apiKeySource": api_key_source,
+            "permissionMode": permission_mode,
+        },
+    )
+
+
+def _parse_user(data: dict[str, Any]) -> Message | None:
+    """Parse a user message event."""
+    content = data.get("message", {}).get("content")
+    if isinstance(content, list):
+        # The CLI sends the prompt as a single text item
+        return UserMessage(content=content[0].get("text", "") if content else "")
+    # Schema drift: content sent as a bare value
+    return UserMessage(content="" if content is None else str(content))
+
+
+def _parse_assistant(data: dict[str, Any]) -> Message | None:
+    """Parse an assistant message event.
+
+    stream-json may emit partial text fragments; each assistant event contains
+    a complete message segment between tool calls.
+    """
+    message_data = data.get("message", {})
+    content_list = message_data.get("content", [])
+    blocks: list[TextBlock | ToolUseBlock | ToolResultBlock] = []
+    # Adjacent text fragments are merged into a single TextBlock
+    pending_text: list[str] = []
+
+    for item in content_list:
+        get = item.get
+        kind = get("type")
+        if kind == _TYPE_TEXT:
+            text = get("text")
+            if text:  # Only emit if there's actual text
+                pending_text.append(text)
+        elif kind == _TYPE_TOOL_USE:
+            if pending_text:
+                blocks.append(TextBlock(text="".join(pending_text)))
+                pending_text.clear()
+            blocks.append(ToolUseBlock(
+                id=get("id", ""),
+                name=get("name", ""),
+                input=get("input") or {},
+            ))
+
+    if pending_text:
+        blocks.append(TextBlock(text="".join(pending_text)))
+
+    # Only return if we have content
+    if blocks:
+        return AssistantMessage(
+            content=blocks,
+            model=data.get("model", _UNKNOWN_MODEL),
+        )
+    return None
+
+
+def _wrap_tool_block(
+    block: ToolUseBlock | ToolResultBlock, model: str = _UNKNOWN_MODEL
+) -> AssistantMessage:
+    """Wrap a single tool block from a tool_call event in an AssistantMessage."""
+    return AssistantMessage(content=[block], model=model)
+
+
+def _parse_tool_call(data: dict[str, Any]) -> Message | None:
+    """Parse a tool call event into a ToolUseBlock or ToolResultBlock."""
+    subtype = data.get("subtype")
+    call_id = data.get("call_id", "")
+    tool_call = data.get("tool_call", {})
+
+    if subtype == _SUBTYPE_STARTED:
+        # Extract tool info from various formats
+        tool_name = ""
+        tool_input: dict[str, Any] = {}
+
+        if "readToolCall" in tool_call:
+            tool_name = "Read"
+            tool_input = tool_call["readToolCall"].get("args", {})
+        elif "writeToolCall" in tool_call:
+            tool_name = "Write"
+            tool_input = tool_call["writeToolCall"].get("args", {})
+        elif "function" in tool_call:
+            tool_name = tool_call["function"].get("name", "")
+            args_str = tool_call["function"].get("arguments", "{}")
+            try:
+                tool_input = _loads(args_str) if isinstance(args_str, str) else args_str
+            except json.JSONDecodeError:
+                tool_input = {"raw": args_str}
+
+        # Return as an AssistantMessage with tool use
+        return _wrap_tool_block(ToolUseBlock(id=call_id, name=tool_name, input=tool_input))
+
+    elif subtype == _SUBTYPE_COMPLETED:
+        # Extract result
+        result_content: str | dict[str, Any] = ""
+
+        if "readToolCall" in tool_call:
+            result = tool_call["readToolCall"].get("result", {})
+            success = result.get("success", {})
+            result_content = success.get("content", "")
+        elif "writeToolCall" in tool_call:
+            result = tool_call["writeToolCall"].get("result", {})
+            success = result.get("success", {})
+            # Passed through as parsed rather than re-serialized to a str
+            result_content = success
+
+        # Return as an AssistantMessage with tool result
+        return _wrap_tool_block(ToolResultBlock(tool_use_id=call_id, content=result_content))
+
+    return None
+
+
+def _parse_result(data: dict[str, Any]) -> Message | None:
+    """Parse the final result event."""
+    return ResultMessage(
+        subtype=data.get("subtype") or "success",
+        duration_ms=data.get("duration_ms", 0),
+        duration_api_ms=data.get("duration_api_ms", 0),
+        is_error=data.get("is_error", False),
+        session_id=data.get("session_id", ""),
+        result=data.get("result"),
+    )
+
+
+def _parse_none(data: dict[str, Any]) -> Message | None:
+    """Ignore event types the SDK has no Message for."""
+    return None
+
+
+# Event type -> handler, looked up once per event
+_HANDLERS: dict[str, Callable[[dict[str, Any]], Message | None]] = {
+    "system": _parse_system,
+    "user": _parse_user,
+    "assistant": _parse_assistant,
+    "tool_call": _parse_tool_call,
+    "result": _parse_result,
+}
+
+
+def _parse_event(data: dict[str, Any]) -> Message | None:
+    """Parse a cursor-agent event into a Message type."""
+    return _HANDLERS.get(data.get("type", ""), _parse_none)(data)
+
+
+async def _iter_lines(
+    stream: ByteReceiveStream, max_line_size: int
+) -> AsyncGenerator[bytes, None]:
+    """Yield newline-delimited lines from a byte stream, without the newline.
+
+    A final line without a trailing newline is yielded at end of stream.
+    Raises CLIJSONDecodeError if an unterminated line grows past max_line_size.
+    """
+    buffer = bytearray()
+    # Length of the buffered tail already searched for a newline
+    scanned = 0
+
+    # On asyncio, anyio's process stream is a thin wrapper over
+    # StreamReader.read(); calling receive() directly skips the extra
+    # __anext__ frame per chunk while keeping trio support. The pipe itself
+    # is already read by the event loop's add_reader callback with one large
+    # os.read() per wakeup, so there is no gain in hand-rolling that here.
+    receive = stream.receive
+
+    while True:
+        try:
+            chunk = await receive(_READ_CHUNK_SIZE)
+        except anyio.EndOfStream:
+            break
+
+        buffer.extend(chunk)
+
+        # Copy each complete line out exactly once, then drop all of them with a
+        # single del instead of one per line. The search resumes past the tail
+        # already scanned on earlier chunks.
+        start = 0
+        newline = buffer.find(b"\n", scanned)
+        with memoryview(buffer) as view:
+            while newline != -1:
+                yield bytes(view[start:newline])
+                start = newline + 1
+                newline = buffer.find(b"\n", start)
+
+        del buffer[:start]
+        scanned = len(buffer)
+
+        # Only the unterminated line counts against the limit
+        if len(buffer) > max_line_size:
+            buffer_length = len(buffer)
+            buffer.clear()
+            raise CLIJSONDecodeError(
+                f"JSON message exceeded maximum buffer size of {max_line_size} bytes",
+                ValueError(f"Buffer size {buffer_length} exceeds limit"),
+            )
+
+    if buffer:
+        yield bytes(buffer)
 
 
 class SubprocessCLITransport:
@@ -42,22 +340,50 @@ class SubprocessCLITransport:
         options: CursorAgentOptions,
     ):
         self._prompt = prompt
+        self._prompt_bytes = prompt.encode("utf-8")
         self._options = options
+        # System prompt is prepended to every prompt sent, separated by a blank line
+        self._system_prompt_bytes = (
+            options.system_prompt.encode("utf-8") + b"\n\n" if options.system_prompt else b""
+        )
         self._is_windows = platform.system() == "Windows"
+        self._cli_cache_key = str(options.cli_path) if options.cli_path else None
         self._cli_path, self._is_node_js = self._find_cli(options.cli_path)
         self._cwd = str(options.cwd) if options.cwd else None
         self._process: Process | None = None
-        self._stdout_stream: TextReceiveStream | None = None
-        self._stderr_stream: TextReceiveStream | None = None
         self._ready = False
         self._exit_error: Exception | None = None
+        self._stderr_file: IO[bytes] | None = None
+        # End of the stderr file from before it was last cut back
+        self._stderr_tail = b""
         self._max_buffer_size = (
             options.max_buffer_size
             if options.max_buffer_size is not None
             else _DEFAULT_MAX_BUFFER_SIZE
         )
+        # The prompt is sent over stdin, so the argv only depends on the options
+        self._cmd = self._build_command()
+        # Likewise the environment, so restarts don't copy os.environ again
+        self._process_env = self._build_env()
 
     def _find_cli(self, cli_path_override: str | Path | None = None) -> tuple[str, bool]:
+        """Find cursor-agent CLI, reusing a recent result from another transport.
+
+        Returns:
+            Tuple of (path, is_node_js) where is_node_js indicates if we need to run via node.
+        """
+        key = str(cli_path_override) if cli_path_override else None
+        now = time.monotonic()
+
+        cached = _CLI_CACHE.get(key)
+        if cached and now - cached[2] < _CLI_CACHE_TTL:
+            return (cached[0], cached[1])
+
+        cli_path, is_node_js = self._discover_cli(cli_path_override)
+        _CLI_CACHE[key] = (cli_path, is_node_js, now)
+        return (cli_path, is_node_js)
+
+    def _discover_cli(self, cli_path_override: str | Path | None = None) -> tuple[str, bool]:
         """Find cursor-agent CLI binary or Node.js script.
         
         Returns:
@@ -78,7 +404,7 @@ class SubprocessCLITransport:
         if self._is_windows:
             # Windows: Look for the community-patched Node.js version
             windows_locations = [
-                _DEFAULT_WINDOWS_CURSOR_AGENT_JS,
+                _default_windows_cli_path(),
                 Path.home() / "cursor-agent" / "index.js",
                 Path("C:/cursor-agent/index.js"),
             ]
@@ -95,7 +421,7 @@ class SubprocessCLITransport:
                 "cursor-agent not found on Windows.\n\n"
                 "Option 1: Use the community-patched Windows version:\n"
                 "  Download from: https://github.com/gitcnd/cursor-agent-cli-windows\n"
-                f"  Expected at: {_DEFAULT_WINDOWS_CURSOR_AGENT_JS}\n\n"
+                f"  Expected at: {_default_windows_cli_path()}\n\n"
                 "Option 2: Provide the path via CursorAgentOptions:\n"
                 "  CursorAgentOptions(cli_path='C:/path/to/index.js')\n"
             )
@@ -118,12 +444,21 @@ class SubprocessCLITransport:
                 "  CursorAgentOptions(cli_path='/path/to/cursor-agent')"
             )
 
+    def _build_env(self) -> dict[str, str]:
+        """Build the CLI's environment from os.environ and the options."""
+        process_env = os.environ.copy()
+        process_env["CURSOR_AGENT_SDK_ENTRYPOINT"] = "sdk-py"
+        process_env.update(self._options.env)
+        if self._cwd:
+            process_env["PWD"] = self._cwd
+        return process_env
+
     def _build_command(self) -> list[str]:
         """Build CLI command with arguments."""
         # For Node.js scripts (Windows community patch), we need to run via node
         if self._is_node_js:
             # Find node executable
-            node_path = shutil.which("node")
+            node_path = _find_node()
             if not node_path:
                 raise CLINotFoundError(
                     "Node.js is required to run cursor-agent on Windows.\n"
@@ -146,7 +481,7 @@ class SubprocessCLITransport:
             cmd.extend(["--model", self._options.model])
 
         # Permission mode -> --force flag
-        if self._options.permission_mode in ("acceptEdits", "bypassPermissions"):
+        if self._options.permission_mode in _FORCE_PERMISSION_MODES:
             cmd.append("--force")
 
         # Session resume
@@ -158,11 +493,10 @@ class SubprocessCLITransport:
         # Workspace is controlled via cwd, not a CLI flag
 
         # Extra args
-        for flag, value in self._options.extra_args.items():
-            if value is None:
-                cmd.append(f"--{flag}")
-            else:
-                cmd.extend([f"--{flag}", str(value)])
+        cmd.extend(chain.from_iterable(
+            (f"--{flag}",) if value is None else (f"--{flag}", str(value))
+            for flag, value in self._options.extra_args.items()
+        ))
 
         # Add prompt as positional argument (agent command reads from stdin with -)
         cmd.extend(["agent", "-"])
@@ -170,244 +504,173 @@ class SubprocessCLITransport:
         return cmd
 
     async def connect(self) -> None:
-        """Start subprocess."""
+        """Start subprocess and send the prompt."""
         if self._process:
             return
 
-        cmd = self._build_command()
+        await self.start()
+        await self.send_prompt()
 
-        try:
-            process_env = {
-                **os.environ,
-                **self._options.env,
-            }
+    async def start(self) -> None:
+        """Start subprocess without sending the prompt.
 
-            if self._cwd:
-                process_env["PWD"] = self._cwd
+        cursor-agent waits on stdin until send_prompt() is called, which lets
+        CursorAgentPool start processes before a prompt is available.
+        """
+        if self._process:
+            return
 
+        # stderr is written to a file rather than a pipe, so a chatty CLI can't
+        # fill a pipe nobody reads and stall stdout, without a reader task.
+        # read_messages() cuts the file back to its tail as it grows past
+        # _MAX_STDERR_FILE_SIZE; stderr written while no stdout arrives (or
+        # while the process sits idle in a pool) is only cut at the next event.
+        self._stderr_file = tempfile.TemporaryFile()
+        self._stderr_tail = b""
+        try:
             self._process = await anyio.open_process(
-                cmd,
+                self._cmd,
                 stdin=PIPE,
                 stdout=PIPE,
-                stderr=PIPE,
+                stderr=self._stderr_file,
                 cwd=self._cwd,
-                env=process_env,
+                env=self._process_env,
             )
 
-            if self._process.stdout:
-                self._stdout_stream = TextReceiveStream(self._process.stdout)
-
-            if self._process.stderr:
-                self._stderr_stream = TextReceiveStream(self._process.stderr)
-
-            # Write prompt to stdin
-            if self._process.stdin:
-                # Prepend system prompt if provided
-                full_prompt = self._prompt
-                if self._options.system_prompt:
-                    full_prompt = f"{self._options.system_prompt}\n\n{self._prompt}"
-
-                await self._process.stdin.send(full_prompt.encode("utf-8"))
-                await self._process.stdin.aclose()
-
-            self._ready = True
-
         except FileNotFoundError as e:
+            self._close_stderr_file()
             if self._cwd and not Path(self._cwd).exists():
                 error = CLIConnectionError(f"Working directory does not exist: {self._cwd}")
                 self._exit_error = error
                 raise error from e
+            # Don't keep handing out a binary that has since been removed
+            _CLI_CACHE.pop(self._cli_cache_key, None)
             error = CLINotFoundError(f"cursor-agent not found at: {self._cli_path}")
             self._exit_error = error
             raise error from e
         except Exception as e:
+            self._close_stderr_file()
             error = CLIConnectionError(f"Failed to start cursor-agent: {e}")
             self._exit_error = error
             raise error from e
 
-    async def close(self) -> None:
-        """Close the transport and clean up resources."""
-        if not self._process:
-            self._ready = False
-            return
+    async def send_prompt(self, prompt: str | None = None) -> None:
+        """Write the prompt to stdin and close it.
 
-        self._ready = False
+        Args:
+            prompt: Prompt to send; defaults to the one given to the constructor.
+        """
+        if not self._process:
+            raise CLIConnectionError("Not connected")
 
-        if self._process.returncode is None:
-            with suppress(ProcessLookupError):
-                self._process.terminate()
-                with suppress(Exception):
-                    await self._process.wait()
+        prompt_bytes = self._prompt_bytes if prompt is None else prompt.encode("utf-8")
 
-        self._process = None
-        self._stdout_stream = None
-        self._stderr_stream = None
-        self._exit_error = None
+        try:
+            if self._process.stdin:
+                # One write for the whole input; joining the bytes is cheaper
+                # than a send() round trip per part
+                await self._process.stdin.send(self._system_prompt_bytes + prompt_bytes)
+                await self._process.stdin.aclose()
 
-    def _parse_event(self, data: dict[str, Any]) -> Message | None:
-        """Parse a cursor-agent event into a Message type."""
-        event_type = data.get("type")
-        subtype = data.get("subtype")
-        session_id = data.get("session_id", "")
+            self._ready = True
 
-        if event_type == "system":
-            # System init event
-            return SystemMessage(
-                subtype=subtype or "init",
-                data={
-                    "session_id": session_id,
-                    "model": data.get("model"),
-                    "cwd": data.get("cwd"),
-                    "apiKeySource": data.get("apiKeySource"),
-                    "permissionMode": data.get("permissionMode"),
-                },
-            )
+        except Exception as e:
+            error = CLIConnectionError(f"Failed to send prompt to cursor-agent: {e}")
+            self._exit_error = error
+            raise error from e
 
-        elif event_type == "user":
-            # User message
-            message_data = data.get("message", {})
-            content_list = message_data.get("content", [])
-            if content_list and isinstance(content_list, list):
-                text_content = content_list[0].get("text", "") if content_list else ""
-            else:
-                text_content = str(content_list)
-            return UserMessage(content=text_content)
-
-        elif event_type == "assistant":
-            # Assistant message - note: stream-json may emit partial text fragments
-            # Each assistant event contains a complete message segment between tool calls
-            message_data = data.get("message", {})
-            content_list = message_data.get("content", [])
-            blocks: list[TextBlock | ToolUseBlock | ToolResultBlock] = []
-
-            for item in content_list:
-                if item.get("type") == "text":
-                    text = item.get("text", "")
-                    if text:  # Only emit if there's actual text
-                        blocks.append(TextBlock(text=text))
-                elif item.get("type") == "tool_use":
-                    blocks.append(ToolUseBlock(
-                        id=item.get("id", ""),
-                        name=item.get("name", ""),
-                        input=item.get("input", {}),
-                    ))
-
-            # Only return if we have content
-            if blocks:
-                return AssistantMessage(
-                    content=blocks,
-                    model=data.get("model", "unknown"),
-                )
-            return None
+    def _stderr_output(self) -> str:
+        """Return the end of what the exited CLI wrote to stderr."""
+        stderr_file = self._stderr_file
+        if not stderr_file:
+            return ""
+        # Only seek once the process has exited: it shares the file offset
+        size = stderr_file.seek(0, os.SEEK_END)
+        stderr_file.seek(max(0, size - _MAX_STDERR_SIZE))
+        output = stderr_file.read()
+        if len(output) < _MAX_STDERR_SIZE:
+            output = (self._stderr_tail + output)[-_MAX_STDERR_SIZE:]
+        return output.decode("utf-8", errors="replace")
+
+    def _trim_stderr_file(self) -> None:
+        """Cut the stderr file back to its tail once it passes _MAX_STDERR_FILE_SIZE."""
+        stderr_file = self._stderr_file
+        if not stderr_file or os.fstat(stderr_file.fileno()).st_size <= _MAX_STDERR_FILE_SIZE:
+            return
+        size = stderr_file.seek(0, os.SEEK_END)
+        stderr_file.seek(size - _MAX_STDERR_SIZE)
+        self._stderr_tail = stderr_file.read(_MAX_STDERR_SIZE)
+        # The running CLI shares the file offset, so rewinding here also moves
+        # its next write to the start; output written meanwhile may be lost
+        stderr_file.seek(0)
+        stderr_file.truncate()
+
+    def _close_stderr_file(self) -> None:
+        """Close and delete the stderr file, if any."""
+        stderr_file, self._stderr_file = self._stderr_file, None
+        if stderr_file:
+            stderr_file.close()
 
-        elif event_type == "tool_call":
-            # Tool call events - convert to ToolUseBlock or ToolResultBlock
-            call_id = data.get("call_id", "")
-            tool_call = data.get("tool_call", {})
-
-            if subtype == "started":
-                # Extract tool info from various formats
-                tool_name = ""
-                tool_input: dict[str, Any] = {}
-
-                if "readToolCall" in tool_call:
-                    tool_name = "Read"
-                    tool_input = tool_call["readToolCall"].get("args", {})
-                elif "writeToolCall" in tool_call:
-                    tool_name = "Write"
-                    tool_input = tool_call["writeToolCall"].get("args", {})
-                elif "function" in tool_call:
-                    tool_name = tool_call["function"].get("name", "")
-                    args_str = tool_call["function"].get("arguments", "{}")
-                    try:
-                        tool_input = json.loads(args_str) if isinstance(args_str, str) else args_str
-                    except json.JSONDecodeError:
-                        tool_input = {"raw": args_str}
-
-                # Return as an AssistantMessage with tool use
-                return AssistantMessage(
-                    content=[ToolUseBlock(id=call_id, name=tool_name, input=tool_input)],
-                    model="unknown",
-                )
+    async def close(self) -> None:
+        """Close the transport and clean up resources."""
+        # Shielded so the process is still reaped when close() runs on cancellation
+        with anyio.CancelScope(shield=True):
+            process = self._process
+            if process and process.returncode is None:
+                with suppress(ProcessLookupError):
+                    process.terminate()
+                    with suppress(Exception):
+                        with anyio.move_on_after(_TERMINATE_TIMEOUT):
+                            await process.wait()
+                        if process.returncode is None:
+                            process.kill()
+                            await process.wait()
+
+            await self._release_process()
+        self._exit_error = None
 
-            elif subtype == "completed":
-                # Extract result
-                result_content = ""
-
-                if "readToolCall" in tool_call:
-                    result = tool_call["readToolCall"].get("result", {})
-                    success = result.get("success", {})
-                    result_content = success.get("content", "")
-                elif "writeToolCall" in tool_call:
-                    result = tool_call["writeToolCall"].get("result", {})
-                    success = result.get("success", {})
-                    result_content = json.dumps(success)
-
-                # Return as an AssistantMessage with tool result
-                return AssistantMessage(
-                    content=[ToolResultBlock(tool_use_id=call_id, content=result_content)],
-                    model="unknown",
-                )
+    def _decode_line(self, line: bytes, offset: int) -> Message | None:
+        """Decode one newline-framed stream-json event into a Message.
 
-        elif event_type == "result":
-            # Final result
-            return ResultMessage(
-                subtype=subtype or "success",
-                duration_ms=data.get("duration_ms", 0),
-                duration_api_ms=data.get("duration_api_ms", 0),
-                is_error=data.get("is_error", False),
-                session_id=session_id,
-                result=data.get("result"),
-            )
+        offset is the line's position in stdout, reported if it fails to parse.
+        """
+        # A trailing \r from CRLF output is fine for the parser
+        if not line or line.isspace():
+            return None
 
-        return None
+        try:
+            data = _loads(line)
+        except ValueError as e:
+            # A complete line that isn't JSON is a real error, not a partial read.
+            # ValueError covers JSONDecodeError and the stdlib parser's
+            # UnicodeDecodeError for bytes that aren't valid UTF-8.
+            preview = line[:100].decode("utf-8", errors="replace")
+            raise CLIJSONDecodeError(
+                f"Failed to decode JSON at stdout offset {offset}: {preview!r}", e
+            ) from e
+
+        return _parse_event(data)
 
     async def read_messages(self) -> AsyncIterator[Message]:
         """Read and parse messages from the transport."""
-        if not self._process or not self._stdout_stream:
+        if not self._process or not self._process.stdout:
             raise CLIConnectionError("Not connected")
 
-        json_buffer = ""
-
+        # stream-json emits one event per line; frame on raw bytes and hand each
+        # complete line to the JSON parser directly, skipping a separate UTF-8 decode.
+        lines = _iter_lines(self._process.stdout, self._max_buffer_size)
+        offset = 0
         try:
-            async for line in self._stdout_stream:
-                line_str = line.strip()
-                if not line_str:
-                    continue
-
-                json_lines = line_str.split("\n")
-
-                for json_line in json_lines:
-                    json_line = json_line.strip()
-                    if not json_line:
-                        continue
-
-                    json_buffer += json_line
-
-                    if len(json_buffer) > self._max_buffer_size:
-                        buffer_length = len(json_buffer)
-                        json_buffer = ""
-                        raise CLIJSONDecodeError(
-                            f"JSON message exceeded maximum buffer size of {self._max_buffer_size} bytes",
-                            ValueError(f"Buffer size {buffer_length} exceeds limit"),
-                        )
-
-                    try:
-                        data = json.loads(json_buffer)
-                        json_buffer = ""
-
-                        message = self._parse_event(data)
-                        if message:
-                            yield message
-
-                    except json.JSONDecodeError:
-                        # Continue accumulating
-                        continue
+            async with aclosing(lines):
+                async for line in lines:
+                    message = self._decode_line(line, offset)
+                    offset += len(line) + 1
+                    self._trim_stderr_file()
+                    if message:
+                        yield message
 
         except anyio.ClosedResourceError:
             pass
-        except GeneratorExit:
-            pass
 
         # Check process completion
         try:
@@ -416,21 +679,36 @@ class SubprocessCLITransport:
             returncode = -1
 
         if returncode is not None and returncode != 0:
-            stderr_output = ""
-            if self._stderr_stream:
-                try:
-                    async for line in self._stderr_stream:
-                        stderr_output += line
-                except Exception:
-                    pass
+            stderr_output = self._stderr_output()
 
             self._exit_error = ProcessError(
                 f"cursor-agent failed with exit code {returncode}",
                 exit_code=returncode,
                 stderr=stderr_output,
             )
+
+        # The process has exited and been reaped; release it now so that close()
+        # has nothing left to terminate or wait for
+        await self._release_process()
+
+        if self._exit_error:
             raise self._exit_error
 
+    async def _release_process(self) -> None:
+        """Close the pipes of an exited process and drop its handle."""
+        process, self._process = self._process, None
+        self._ready = False
+
+        self._close_stderr_file()
+
+        if process:
+            with suppress(Exception):
+                await process.aclose()
+
     def is_ready(self) -> bool:
         """Check if transport is ready for communication."""
         return self._ready
+
+    def is_running(self) -> bool:
+        """Check if the subprocess has been started and has not exited."""
+        return self._process is not None and self._process.returncode is None
@@ -13,14 +13,14 @@ from typing import Any, Literal
 PermissionMode = Literal["default", "acceptEdits", "bypassPermissions"]
 
 
-@dataclass
+@dataclass(slots=True)
 class TextBlock:
     """Text content block."""
 
     text: str
 
 
-@dataclass
+@dataclass(slots=True)
 class ToolUseBlock:
     """Tool use content block."""
 
@@ -29,19 +29,19 @@ class ToolUseBlock:
     input: dict[str, Any]
 
 
-@dataclass
+@dataclass(slots=True)
 class ToolResultBlock:
     """Tool result content block."""
 
     tool_use_id: str
-    content: str | list[dict[str, Any]] | None = None
+    content: str | dict[str, Any] | list[dict[str, Any]] | None = None
     is_error: bool | None = None
 
 
 ContentBlock = TextBlock | ToolUseBlock | ToolResultBlock
 
 
-@dataclass
+@dataclass(slots=True)
 class UserMessage:
     """User message."""
 
@@ -49,16 +49,38 @@ class UserMessage:
     uuid: str | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class AssistantMessage:
-    """Assistant message with content blocks."""
+    """Assistant message with content blocks.
+
+    texts holds the text of each TextBlock in content; tool_uses and
+    tool_results hold its tool blocks. Each can be scanned without isinstance
+    checks. They are always derived from content and are left out of repr()
+    and ==.
+    """
 
     content: list[ContentBlock]
     model: str
     parent_tool_use_id: str | None = None
-
-
-@dataclass
+    texts: list[str] = field(default_factory=list, init=False, repr=False, compare=False)
+    tool_uses: list[ToolUseBlock] = field(
+        default_factory=list, init=False, repr=False, compare=False
+    )
+    tool_results: list[ToolResultBlock] = field(
+        default_factory=list, init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        for block in self.content:
+            if isinstance(block, TextBlock):
+                self.texts.append(block.text)
+            elif isinstance(block, ToolUseBlock):
+                self.tool_uses.append(block)
+            elif isinstance(block, ToolResultBlock):
+                self.tool_results.append(block)
+
+
+@dataclass(slots=True)
 class SystemMessage:
     """System message with metadata."""
 
@@ -66,7 +88,7 @@ class SystemMessage:
     data: dict[str, Any]
 
 
-@dataclass
+@dataclass(slots=True)
 class ResultMessage:
     """Result message with session and timing information."""
 
@@ -84,7 +106,7 @@ class ResultMessage:
 Message = UserMessage | AssistantMessage | SystemMessage | ResultMessage
 
 
-@dataclass
+@dataclass(slots=True)
 class CursorAgentOptions:
     """Configuration options for Cursor Agent SDK.
 
@@ -0,0 +1,21 @@
+"""Shared fixtures for cursor_agent_sdk tests."""
+
+import sys
+import textwrap
+
+import pytest
+
+
+@pytest.fixture
+def make_cli(tmp_path):
+    """Return a factory writing an executable Python script that stands in for cursor-agent."""
+    if sys.platform == "win32":
+        pytest.skip("uses a shebang script as the CLI")
+
+    def factory(source: str, name: str = "cursor-agent"):
+        script = tmp_path / name
+        script.write_text(f"#!{sys.executable}\n{textwrap.dedent(source)}")
+        script.chmod(0o755)
+        return script
+
+    return factory
@@ -0,0 +1,135 @@
+"""Tests for cursor_agent_sdk process pool."""
+
+import anyio
+import pytest
+
+from cursor_agent_sdk import (
+    CLIConnectionError,
+    CLINotFoundError,
+    CursorAgentOptions,
+    CursorAgentPool,
+    ResultMessage,
+    query,
+)
+from cursor_agent_sdk.transport import SubprocessCLITransport
+
+_ECHO_CLI = """
+    import json
+    import sys
+
+    prompt = sys.stdin.read()
+    print(json.dumps({"type": "system", "subtype": "init", "session_id": "s1"}))
+    print(json.dumps({"type": "result", "session_id": "s1", "result": prompt}))
+"""
+
+
+async def _result(prompt: str, pool: CursorAgentPool) -> str | None:
+    results = [m async for m in query(prompt=prompt, pool=pool) if isinstance(m, ResultMessage)]
+    return results[-1].result
+
+
+async def test_pool_reuses_started_processes(make_cli):
+    """Test queries through a pool get their own prompt's answer and keep it full."""
+    options = CursorAgentOptions(cli_path=make_cli(_ECHO_CLI))
+    async with CursorAgentPool(options, size=2) as pool:
+        assert len(pool._idle) == 2
+
+        assert await _result("first", pool) == "first"
+        assert await _result("second", pool) == "second"
+
+        # Replacements start in the background
+        await anyio.sleep(0.1)
+        assert len(pool._idle) == 2
+        assert all(transport.is_running() for transport in pool._idle)
+
+    assert pool._idle == []
+
+
+async def test_pool_replaces_processes_that_exited_while_idle(make_cli):
+    """Test acquire() skips idle processes that have already exited."""
+    options = CursorAgentOptions(cli_path=make_cli(_ECHO_CLI))
+    async with CursorAgentPool(options, size=2) as pool:
+        for transport in pool._idle:
+            transport._process.kill()
+            await transport._process.wait()
+
+        assert await _result("hello", pool) == "hello"
+        await anyio.sleep(0.1)
+        assert all(transport.is_running() for transport in pool._idle)
+
+
+async def test_pool_replacement_failure_is_not_fatal(make_cli, monkeypatch):
+    """Test a replacement that fails to start doesn't fail the query or cancel the caller."""
+    options = CursorAgentOptions(cli_path=make_cli(_ECHO_CLI))
+    async with CursorAgentPool(options, size=1) as pool:
+
+        async def failing_spawn():
+            raise RuntimeError("spawn failed")
+
+        monkeypatch.setattr(pool, "_spawn", failing_spawn)
+
+        assert await _result("hello", pool) == "hello"
+        await anyio.sleep(0.1)
+        assert pool._idle == []
+
+
+async def test_pool_acquire_failure_frees_its_slot(make_cli, monkeypatch):
+    """Test a prompt that can't be sent closes the process and releases the slot."""
+    options = CursorAgentOptions(cli_path=make_cli(_ECHO_CLI))
+    async with CursorAgentPool(options, size=1) as pool:
+        transport = pool._idle[0]
+
+        async def failing_send_prompt(self, prompt=None):
+            raise CLIConnectionError("stdin closed")
+
+        monkeypatch.setattr(SubprocessCLITransport, "send_prompt", failing_send_prompt)
+        with pytest.raises(CLIConnectionError):
+            await pool.acquire("hello")
+
+        assert not transport.is_running()
+        monkeypatch.undo()
+
+        with anyio.fail_after(5):
+            assert await _result("again", pool) == "again"
+        await anyio.sleep(0)
+
+
+async def test_pool_errors_propagate_unwrapped(make_cli, tmp_path):
+    """Test errors from starting the pool or from its body aren't wrapped in a group."""
+    with pytest.raises(CLINotFoundError):
+        async with CursorAgentPool(CursorAgentOptions(cli_path=tmp_path / "missing")):
+            pass
+
+    with pytest.raises(KeyError):
+        async with CursorAgentPool(CursorAgentOptions(cli_path=make_cli(_ECHO_CLI)), size=1):
+            raise KeyError("user error")
+
+
+async def test_pool_start_failure_closes_started_processes(make_cli, monkeypatch):
+    """Test processes already started are stopped when a later one fails to start."""
+    pool = CursorAgentPool(CursorAgentOptions(cli_path=make_cli(_ECHO_CLI)), size=2)
+    started = []
+    spawn = pool._spawn
+
+    async def flaky_spawn():
+        if started:
+            raise CLIConnectionError("spawn failed")
+        started.append(await spawn())
+        return started[-1]
+
+    monkeypatch.setattr(pool, "_spawn", flaky_spawn)
+    with pytest.raises(CLIConnectionError):
+        async with pool:
+            pass
+
+    assert pool._idle == []
+    assert not started[0].is_running()
+
+
+async def test_query_rejects_options_with_pool():
+    """Test options and pool cannot both be passed to query()."""
+    pool = CursorAgentPool(CursorAgentOptions(cli_path="cursor-agent"))
+
+    with pytest.raises(ValueError):
+        async for _ in query(prompt="hi", options=CursorAgentOptions(), pool=pool):
+            pass
@@ -0,0 +1,421 @@
+"""Tests for cursor_agent_sdk transport parsing."""
+
+import json
+import os
+
+import anyio
+import pytest
+
+from cursor_agent_sdk import (
+    AssistantMessage,
+    CLIJSONDecodeError,
+    CursorAgentOptions,
+    ProcessError,
+    ResultMessage,
+    SystemMessage,
+    TextBlock,
+    ToolUseBlock,
+    UserMessage,
+    query,
+)
+from cursor_agent_sdk import transport as transport_module
+from cursor_agent_sdk.transport import (
+    SubprocessCLITransport,
+    _parse_event,
+    invalidate_cli_cache,
+)
+
+
+class _FakeProcess:
+    """Minimal stand-in for an exited cursor-agent process."""
+
+    returncode = 0
+    stderr = None
+
+    def __init__(self, stdout):
+        self.stdout = stdout
+
+    async def wait(self) -> int:
+        return self.returncode
+
+    async def aclose(self) -> None:
+        pass
+
+
+class _FakeStream:
+    """Byte stream returning the given chunks, then end of stream."""
+
+    def __init__(self, chunks: list[bytes]):
+        self._chunks = list(chunks)
+
+    async def receive(self, max_bytes: int = 65536) -> bytes:
+        if not self._chunks:
+            raise anyio.EndOfStream
+        return self._chunks.pop(0)
+
+
+def _make_transport(chunks: list[bytes]) -> SubprocessCLITransport:
+    transport = SubprocessCLITransport(
+        prompt="hi",
+        options=CursorAgentOptions(cli_path="cursor-agent"),
+    )
+    transport._process = _FakeProcess(_FakeStream(chunks))
+    return transport
+
+
+async def _collect(transport: SubprocessCLITransport) -> list:
+    return [message async for message in transport.read_messages()]
+
+
+_SYSTEM_EVENT = {"type": "system", "subtype": "init", "session_id": "s1", "model": "gpt-4"}
+_ASSISTANT_EVENT = {
+    "type": "assistant",
+    "message": {"content": [{"type": "text", "text": "Hello"}]},
+}
+_RESULT_EVENT = {"type": "result", "subtype": "success", "session_id": "s1", "result": "Hello"}
+
+
+async def test_read_messages_one_event_per_line():
+    """Test each newline-terminated event yields one message."""
+    events = (_SYSTEM_EVENT, _ASSISTANT_EVENT, _RESULT_EVENT)
+    stream = b"".join(json.dumps(e).encode() + b"\n" for e in events)
+    transport = _make_transport([stream])
+    messages = await _collect(transport)
+
+    assert [type(m) for m in messages] == [SystemMessage, AssistantMessage, ResultMessage]
+    # The exited process is released once its output has been drained
+    assert transport._process is None
+    assert messages[0].data["session_id"] == "s1"
+    assert messages[1].content[0].text == "Hello"
+    assert messages[2].result == "Hello"
+
+
+async def test_read_messages_event_split_across_chunks():
+    """Test an event split over several chunks is reassembled."""
+    line = (json.dumps(_ASSISTANT_EVENT) + "\n" + json.dumps(_RESULT_EVENT) + "\n").encode()
+    chunks = [line[:7], line[7:30], line[30:]]
+    messages = await _collect(_make_transport(chunks))
+
+    assert [type(m) for m in messages] == [AssistantMessage, ResultMessage]
+    assert messages[0].content[0].text == "Hello"
+
+
+async def test_read_messages_skips_blank_and_unterminated_lines():
+    """Test blank lines are ignored and a final unterminated event is parsed."""
+    stream = b"\n\n" + json.dumps(_RESULT_EVENT).encode()
+    messages = await _collect(_make_transport([stream]))
+
+    assert [type(m) for m in messages] == [ResultMessage]
+
+
+def test_cli_discovery_is_cached(monkeypatch):
+    """Test repeated transports reuse the discovered cursor-agent path."""
+    calls = []
+
+    def fake_which(name):
+        calls.append(name)
+        return "/opt/bin/cursor-agent"
+
+    monkeypatch.setattr(transport_module.shutil, "which", fake_which)
+    invalidate_cli_cache()
+
+    try:
+        for _ in range(3):
+            transport = SubprocessCLITransport(prompt="hi", options=CursorAgentOptions())
+            assert transport._cli_path == "/opt/bin/cursor-agent"
+        assert calls == ["cursor-agent"]
+
+        invalidate_cli_cache()
+        SubprocessCLITransport(prompt="hi", options=CursorAgentOptions())
+        assert calls == ["cursor-agent", "cursor-agent"]
+    finally:
+        invalidate_cli_cache()
+
+
+def test_parse_system_event():
+    """Test system init events keep their metadata, with or without every field."""
+    full = {
+        "type": "system",
+        "subtype": "init",
+        "session_id": "s1",
+        "model": "gpt-4",
+        "cwd": "/tmp",
+        "apiKeySource": "login",
+        "permissionMode": "default",
+    }
+    expected = {k: v for k, v in full.items() if k not in ("type", "subtype")}
+    assert _parse_event(full).data == expected
+
+    partial = _parse_event({"type": "system"})
+    assert partial.subtype == "init"
+    assert partial.data["session_id"] == ""
+    assert partial.data["cwd"] is None
+
+
+def test_parse_user_event():
+    """Test user events yield the prompt text."""
+    message = _parse_event(
+        {"type": "user", "message": {"content": [{"type": "text", "text": "What is 2 + 2?"}]}}
+    )
+    assert isinstance(message, UserMessage)
+    assert message.content == "What is 2 + 2?"
+
+    assert _parse_event({"type": "user", "message": {"content": []}}).content == ""
+    assert _parse_event({"type": "user", "message": {"content": "hi"}}).content == "hi"
+
+
+def test_parse_write_tool_result_keeps_dict():
+    """Test a completed writeToolCall passes its result through without re-serializing."""
+    success = {"path": "a.py", "linesCreated": 3}
+    message = _parse_event(
+        {
+            "type": "tool_call",
+            "subtype": "completed",
+            "call_id": "t1",
+            "tool_call": {"writeToolCall": {"result": {"success": success}}},
+        }
+    )
+
+    assert message.tool_results[0].tool_use_id == "t1"
+    assert message.tool_results[0].content == success
+
+
+def test_parse_assistant_merges_adjacent_text():
+    """Test consecutive text items become one TextBlock, split by tool use."""
+    message = _parse_event(
+        {
+            "type": "assistant",
+            "message": {
+                "content": [
+                    {"type": "text", "text": "Hel"},
+                    {"type": "text", "text": ""},
+                    {"type": "text", "text": "lo"},
+                    {"type": "tool_use", "id": "t1", "name": "Read", "input": {"path": "a"}},
+                    {"type": "text", "text": "Done"},
+                ]
+            },
+        }
+    )
+
+    assert isinstance(message, AssistantMessage)
+    assert [type(b) for b in message.content] == [TextBlock, ToolUseBlock, TextBlock]
+    assert message.content[0].text == "Hello"
+    assert message.content[1].name == "Read"
+    assert message.content[2].text == "Done"
+    assert message.texts == ["Hello", "Done"]
+    assert message.tool_uses == [message.content[1]]
+    assert message.tool_results == []
+
+
+async def test_read_messages_accepts_crlf_lines():
+    """Test CRLF-terminated and whitespace-only lines are handled."""
+    stream = b"  \r\n" + json.dumps(_RESULT_EVENT).encode() + b"\r\n"
+    messages = await _collect(_make_transport([stream]))
+
+    assert [type(m) for m in messages] == [ResultMessage]
+
+
+async def test_large_stderr_does_not_stall(make_cli):
+    """Test a CLI writing more than a pipe buffer to stderr doesn't stall and is reported."""
+    cli = make_cli(
+        """
+        import json
+        import sys
+
+        sys.stdin.read()
+        sys.stderr.write("x" * 200_000 + "\\nboom\\n")
+        sys.stderr.flush()
+        print(json.dumps({"type": "result", "subtype": "error", "session_id": "s1"}))
+        sys.exit(3)
+        """
+    )
+
+    messages = []
+    with anyio.fail_after(10), pytest.raises(ProcessError) as exc_info:
+        async for message in query(prompt="hi", options=CursorAgentOptions(cli_path=cli)):
+            messages.append(message)
+
+    assert [type(m) for m in messages] == [ResultMessage]
+    assert exc_info.value.exit_code == 3
+    assert exc_info.value.stderr.endswith("boom\n")
+    assert len(exc_info.value.stderr) == transport_module._MAX_STDERR_SIZE
+
+
+_SLOW_CLI = """
+    import json
+    import sys
+    import time
+
+    sys.stdin.read()
+    print(json.dumps({"type": "system", "subtype": "init", "session_id": "s1"}), flush=True)
+    time.sleep(60)
+"""
+
+
+async def test_breaking_out_of_query_leaves_caller_running(make_cli):
+    """Test a plain break doesn't cancel the caller once the generator is finalized."""
+    options = CursorAgentOptions(cli_path=make_cli(_SLOW_CLI))
+
+    async for message in query(prompt="hi", options=options):
+        assert isinstance(message, SystemMessage)
+        break
+
+    # The abandoned generator is closed by the event loop in another task
+    await anyio.sleep(0.2)
+    await anyio.sleep(0)
+
+
+def test_query_inside_cancel_scope_on_trio(make_cli):
+    """Test query() under a timeout doesn't disturb trio's cancel scope stack."""
+    pytest.importorskip("trio")
+    options = CursorAgentOptions(cli_path=make_cli(_SLOW_CLI))
+
+    async def main() -> list:
+        messages = []
+        with anyio.move_on_after(0.5):
+            async for message in query(prompt="hi", options=options):
+                messages.append(message)
+        await anyio.sleep(0)
+        return messages
+
+    assert [type(m) for m in anyio.run(main, backend="trio")] == [SystemMessage]
+
+
+async def test_stopping_early_terminates_the_cli(make_cli):
+    """Test breaking out of query() doesn't wait for the CLI to finish on its own."""
+    messages = query(prompt="hi", options=CursorAgentOptions(cli_path=make_cli(_SLOW_CLI)))
+    with anyio.fail_after(10):
+        async for message in messages:
+            assert isinstance(message, SystemMessage)
+            break
+        await messages.aclose()
+
+
+async def test_stderr_file_is_cut_back_while_reading(make_cli):
+    """Test the stderr file stays bounded during a long run and keeps its tail."""
+    cli = make_cli(
+        """
+        import json
+        import sys
+        import time
+
+        sys.stdin.read()
+        for i in range(20):
+            sys.stderr.write("x" * 100_000 + "\\n")
+            sys.stderr.flush()
+            print(json.dumps({"type": "user", "message": {"content": str(i)}}), flush=True)
+            time.sleep(0.02)
+        sys.stderr.write("boom\\n")
+        sys.exit(3)
+        """
+    )
+    transport = SubprocessCLITransport(prompt="hi", options=CursorAgentOptions(cli_path=cli))
+    await transport.connect()
+    sizes = []
+
+    with anyio.fail_after(10), pytest.raises(ProcessError) as exc_info:
+        async for _ in transport.read_messages():
+            sizes.append(os.fstat(transport._stderr_file.fileno()).st_size)
+
+    assert len(sizes) == 20
+    assert max(sizes) <= transport_module._MAX_STDERR_FILE_SIZE + 200_000
+    assert exc_info.value.stderr.endswith("x\nboom\n")
+    assert len(exc_info.value.stderr) == transport_module._MAX_STDERR_SIZE
+
+
+async def test_entrypoint_is_set_only_in_child_env(make_cli, monkeypatch):
+    """Test CURSOR_AGENT_SDK_ENTRYPOINT reaches the CLI without touching os.environ."""
+    monkeypatch.delenv("CURSOR_AGENT_SDK_ENTRYPOINT", raising=False)
+    cli = make_cli(
+        """
+        import json
+        import os
+        import sys
+
+        sys.stdin.read()
+        result = os.environ.get("CURSOR_AGENT_SDK_ENTRYPOINT")
+        print(json.dumps({"type": "result", "session_id": "s1", "result": result}))
+        """
+    )
+
+    messages = [m async for m in query(prompt="hi", options=CursorAgentOptions(cli_path=cli))]
+
+    assert messages[-1].result == "sdk-py"
+    assert "CURSOR_AGENT_SDK_ENTRYPOINT" not in os.environ
+
+
+async def test_system_prompt_is_sent_before_prompt(make_cli):
+    """Test the system prompt and prompt reach stdin separated by a blank line."""
+    cli = make_cli(
+        """
+        import json
+        import sys
+
+        prompt = sys.stdin.read()
+        print(json.dumps({"type": "result", "session_id": "s1", "result": prompt}))
+        """
+    )
+    options = CursorAgentOptions(cli_path=cli, system_prompt="Be brief.")
+
+    messages = [m async for m in query(prompt="hi", options=options)]
+
+    assert messages[-1].result == "Be brief.\n\nhi"
+
+
+async def test_max_buffer_size_applies_per_frame():
+    """Test the buffer limit counts an unterminated frame, not a chunk of complete ones."""
+    line = json.dumps(_ASSISTANT_EVENT).encode() + b"\n"
+    transport = _make_transport([line * 4])
+    transport._max_buffer_size = len(line) + 1
+
+    assert len(await _collect(transport)) == 4
+
+    unterminated = b'{"type": "assistant", "message": {' + b" " * len(line)
+    transport = _make_transport([line * 4 + unterminated])
+    transport._max_buffer_size = len(line) + 1
+
+    with pytest.raises(CLIJSONDecodeError):
+        await _collect(transport)
+
+
+async def test_read_messages_rejects_non_json_line():
+    """Test a complete line that isn't JSON raises with its stream offset."""
+    first = json.dumps(_SYSTEM_EVENT).encode() + b"\n"
+    transport = _make_transport([first + b"not json\n" + json.dumps(_RESULT_EVENT).encode()])
+
+    with pytest.raises(CLIJSONDecodeError, match=f"offset {len(first)}: 'not json'"):
+        await _collect(transport)
+
+
+@pytest.mark.parametrize("loads", [json.loads, transport_module._loads])
+async def test_read_messages_rejects_invalid_utf8_line(monkeypatch, loads):
+    """Test a line that isn't UTF-8 raises CLIJSONDecodeError with either JSON backend."""
+    monkeypatch.setattr(transport_module, "_loads", loads)
+    transport = _make_transport([b'{"type": "result", "result": "caf\xe9"}\n'])
+
+    with pytest.raises(CLIJSONDecodeError, match="offset 0"):
+        await _collect(transport)
+
+
+def test_build_command_is_computed_once():
+    """Test the argv is built from the options at construction."""
+    transport = SubprocessCLITransport(
+        prompt="hi",
+        options=CursorAgentOptions(
+            cli_path="cursor-agent",
+            model="gpt-4",
+            permission_mode="acceptEdits",
+            extra_args={"verbose": None, "workspace": "/tmp"},
+        ),
+    )
+
+    assert transport._cmd == [
+        "cursor-agent",
+        "--print",
+        "--output-format", "stream-json",
+        "--model", "gpt-4",
+        "--force",
+        "--verbose",
+        "--workspace", "/tmp",
+        "agent", "-",
+    ]
@@ -1,5 +1,7 @@
 """Tests for cursor_agent_sdk types."""
 
+from dataclasses import replace
+
 import pytest
 
 from cursor_agent_sdk import (
@@ -63,6 +65,35 @@ def test_assistant_message():
     assert msg.model == "gpt-4"
 
 
+def test_assistant_message_groups_blocks_by_kind():
+    """Test AssistantMessage derives texts, tool_uses and tool_results from content."""
+    tool_use = ToolUseBlock(id="t1", name="Read", input={})
+    tool_result = ToolResultBlock(tool_use_id="t1", content="ok")
+    msg = AssistantMessage(
+        content=[TextBlock(text="a"), tool_use, tool_result, TextBlock(text="b")],
+        model="gpt-4",
+    )
+    assert msg.texts == ["a", "b"]
+    assert msg.tool_uses == [tool_use]
+    assert msg.tool_results == [tool_result]
+
+
+def test_assistant_message_groups_follow_content():
+    """Test replace() rederives the groups and repr()/== ignore them."""
+    msg = AssistantMessage(
+        content=[TextBlock(text="a"), ToolUseBlock(id="t1", name="Read", input={})],
+        model="gpt-4",
+    )
+
+    replaced = replace(msg, content=[TextBlock(text="zzz")])
+    assert replaced.texts == ["zzz"]
+    assert replaced.tool_uses == []
+
+    assert repr(msg).count("ToolUseBlock") == 1
+    assert "texts" not in repr(msg)
+    assert msg == AssistantMessage(content=list(msg.content), model="gpt-4")
+
+
 def test_system_message():
     """Test SystemMessage creation."""
     msg = SystemMessage(
@@ -110,3 +141,20 @@ def test_cursor_agent_options_with_values():
     assert options.permission_mode == "acceptEdits"
     assert options.cwd == "/path/to/project"
     assert options.extra_args == {"verbose": None}
+
+
+def test_types_use_slots():
+    """Test SDK dataclasses don't carry a per-instance __dict__."""
+    for obj in (
+        CursorAgentOptions(),
+        TextBlock(text="hi"),
+        ToolUseBlock(id="t", name="Read", input={}),
+        ToolResultBlock(tool_use_id="t"),
+        UserMessage(content="hi"),
+        AssistantMessage(content=[], model="gpt-4"),
+        SystemMessage(subtype="init", data={}),
+        ResultMessage(
+            subtype="success", duration_ms=0, duration_api_ms=0, is_error=False, session_id="s"
+        ),
+    ):
+        assert not hasattr(obj, "__dict__")